@@ -1,11 +1,27 @@
-import json
+import asyncio
+import atexit
+import ipaddress
 import os
+import sqlite3
 import sys
+import time
 from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
-from typing import Optional
+from typing import Dict, Iterable, Optional
 
-import requests
+import httpx
+
+_IPWHO_HOST = "ipwho.is"
+_IPWHO_URL = "https://ipwho.is/{}"
+_IPWHO_PARAMS = (("fields", "success,message,city,region,country,org,connection.isp,connection.org"),)
+
+
+def _is_lan_address(ip: str) -> bool:
+    try:
+        addr = ipaddress.ip_address(ip)
+    except ValueError:
+        return False
+    return addr.is_private or addr.is_loopback or addr.is_link_local or addr.is_reserved
 
 
 @dataclass
@@ -23,102 +39,218 @@ class GeoCache:
         ttl_hours: int = 24,
         failure_ttl_minutes: int = 30,
         error_log_interval_minutes: int = 10,
+        flush_interval_seconds: int = 30,
     ):
         self.path = path
         self.enabled = enabled
+        self.flush_interval_seconds = flush_interval_seconds
         self.ttl = timedelta(hours=ttl_hours)
         self.failure_ttl = timedelta(minutes=failure_ttl_minutes)
         self._error_log_interval = timedelta(minutes=error_log_interval_minutes)
         self._last_error_utc: Optional[datetime] = None
         self._last_error_msg: Optional[str] = None
-        self._cache = self._read()
+        self._dirty = False
+        self._last_flush = 0.0
+        self._db = self._open()
+        # ip -> (time.monotonic() expiry, summary); skips the SELECT on hot hits.
+        self._hot: dict[str, tuple[float, Optional[str]]] = {}
+        self._async_client = httpx.AsyncClient(
+            http2=True,
+            timeout=6,
+            headers={"User-Agent": "session-monitor/1.0"},
+            limits=httpx.Limits(max_connections=4, max_keepalive_connections=4, keepalive_expiry=60),
+        )
+        self._sem = asyncio.Semaphore(4)
+        self._retries_by_host: dict[str, int] = {}
+        # host -> time.monotonic() until which lookups are skipped after a 429/5xx.
+        self._blocked_until_by_host: dict[str, float] = {}
+        atexit.register(self.flush, force=True)
 
-    def _read(self) -> dict:
-        if not os.path.exists(self.path):
-            return {}
+    def _open(self) -> sqlite3.Connection:
         try:
-            with open(self.path, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except Exception:
-            return {}
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            db = sqlite3.connect(self.path)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+        except (OSError, sqlite3.Error) as exc:
+            # Best-effort cache: keep working without persistence.
+            print(f"[geo] cache open failed, using memory: {exc.__class__.__name__}: {exc}", file=sys.stderr)
+            db = sqlite3.connect(":memory:")
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS geo ("
+            "ip TEXT PRIMARY KEY, summary TEXT, fetched_epoch REAL, failed_epoch REAL, reason TEXT)"
+        )
+        db.commit()
+        return db
 
-    def _write(self) -> None:
-        os.makedirs(os.path.dirname(self.path), exist_ok=True)
-        tmp = self.path + ".tmp"
-        with open(tmp, "w", encoding="utf-8") as f:
-            json.dump(self._cache, f, indent=2, sort_keys=True)
-        os.replace(tmp, self.path)
+    def flush(self, *, force: bool = False) -> None:
+        if not self._dirty:
+            return
+        now = time.monotonic()
+        if not force and (now - self._last_flush) < self.flush_interval_seconds:
+            return
+        try:
+            self._db.commit()
+        except sqlite3.Error as exc:
+            print(f"[geo] cache write failed: {exc.__class__.__name__}: {exc}", file=sys.stderr)
+            return
+        self._dirty = False
+        self._last_flush = now
+
+    def _hot_summary(self, ip: str) -> tuple[bool, Optional[str]]:
+        hot = self._hot.get(ip)
+        if hot is not None and time.monotonic() < hot[0]:
+            return True, hot[1]
+        return False, None
+
+    def _cached_summary(self, ip: str, now: datetime) -> tuple[bool, Optional[str]]:
+        try:
+            cached = self._db.execute(
+                "SELECT summary, fetched_epoch, failed_epoch FROM geo WHERE ip = ?", (ip,)
+            ).fetchone()
+        except sqlite3.Error:
+            cached = None
+        if cached:
+            now_epoch = now.timestamp()
+            summary, fetched, failed = cached
+            if summary and fetched is not None:
+                remaining = self.ttl.total_seconds() - (now_epoch - fetched)
+                if remaining >= 0:
+                    self._hot[ip] = (time.monotonic() + remaining, summary)
+                    return True, summary
+            if failed is not None:
+                remaining = self.failure_ttl.total_seconds() - (now_epoch - failed)
+                if remaining >= 0:
+                    self._hot[ip] = (time.monotonic() + remaining, None)
+                    return True, None
+        return False, None
+
+    def _execute_write(self, sql: str, params: tuple) -> None:
+        try:
+            cur = self._db.execute(sql, params)
+        except sqlite3.Error as exc:
+            print(f"[geo] cache write failed: {exc.__class__.__name__}: {exc}", file=sys.stderr)
+            return
+        if cur.rowcount:
+            self._dirty = True
+
+    def _record(self, ip: str, now: datetime, summary: Optional[str], error: Optional[str]) -> None:
+        if summary:
+            self._execute_write(
+                "INSERT OR REPLACE INTO geo (ip, summary, fetched_epoch, failed_epoch, reason) VALUES (?, ?, ?, NULL, NULL)",
+                (ip, summary, now.timestamp()),
+            )
+            self._hot[ip] = (time.monotonic() + self.ttl.total_seconds(), summary)
+        elif error:
+            # Repeat failures (e.g. during an outage) only refresh the in-memory
+            # window; the row on disk already records that this IP is failing.
+            self._execute_write(
+                "INSERT INTO geo (ip, summary, fetched_epoch, failed_epoch, reason) VALUES (?, NULL, NULL, ?, ?) "
+                "ON CONFLICT(ip) DO UPDATE SET summary = NULL, fetched_epoch = NULL, "
+                "failed_epoch = excluded.failed_epoch, reason = excluded.reason "
+                "WHERE geo.failed_epoch IS NULL",
+                (ip, now.timestamp(), error),
+            )
+            self._hot[ip] = (time.monotonic() + self.failure_ttl.total_seconds(), None)
+            self._log_error(ip, error, now)
 
-    def get_geo_string(self, ip: str) -> Optional[str]:
+    async def get_geo_string_async(self, ip: str, now: Optional[datetime] = None) -> Optional[str]:
         if not self.enabled:
             return None
         ip = (ip or "").strip()
         if not ip:
             return None
+        if _is_lan_address(ip):
+            return "LAN"
 
-        now = datetime.now(timezone.utc)
-        cached = self._cache.get(ip)
-        if cached:
-            try:
-                summary = cached.get("summary")
-                fetched_raw = cached.get("fetched_at_utc")
-                if summary and fetched_raw:
-                    fetched = datetime.fromisoformat(fetched_raw)
-                    if fetched.tzinfo is None:
-                        fetched = fetched.replace(tzinfo=timezone.utc)
-                    if (now - fetched) <= self.ttl:
-                        return summary
-                failed_raw = cached.get("failed_at_utc")
-                if failed_raw:
-                    failed = datetime.fromisoformat(failed_raw)
-                    if failed.tzinfo is None:
-                        failed = failed.replace(tzinfo=timezone.utc)
-                    if (now - failed) <= self.failure_ttl:
-                        return None
-            except Exception:
-                pass
-
-        summary, error = self._lookup_ipwho_is(ip)
-        if summary:
-            self._cache[ip] = {"summary": summary, "fetched_at_utc": now.isoformat()}
-            self._write()
-        elif error:
-            self._cache[ip] = {"summary": None, "failed_at_utc": now.isoformat(), "failure_reason": error}
-            self._write()
-            self._log_error(ip, error)
+        hit, summary = self._hot_summary(ip)
+        if hit:
+            return summary
+
+        if now is None:
+            now = datetime.now(timezone.utc)
+        hit, summary = self._cached_summary(ip, now)
+        if hit:
+            return summary
+
+        summary, error = await self._lookup_ipwho_is_async(ip)
+        self._record(ip, now, summary, error)
         return summary
 
-    def _lookup_ipwho_is(self, ip: str) -> tuple[Optional[str], Optional[str]]:
-        try:
-            resp = requests.get(
-                f"https://ipwho.is/{ip}",
-                params={"fields": "success,message,city,region,country,org,connection.isp,connection.org"},
-                timeout=6,
-            )
-            if resp.status_code != 200:
-                return None, f"ipwho status {resp.status_code}"
-            data = resp.json()
-            if not data.get("success", True):
-                reason = data.get("message") or "ipwho error"
-                return None, reason
-            city = data.get("city")
-            region = data.get("region")
-            country = data.get("country")
-            org = data.get("org")
-            if not org:
-                connection = data.get("connection") or {}
-                org = connection.get("org") or connection.get("isp")
-
-            parts = [p for p in [city, region, country] if p]
-            loc = ", ".join(parts) if parts else None
-            if loc and org:
-                return f"{loc} | {org}", None
-            return (loc or org), None
-        except Exception as exc:
-            return None, f"ipwho request failed ({exc.__class__.__name__})"
-
-    def _log_error(self, ip: str, message: str) -> None:
-        now = datetime.now(timezone.utc)
+    async def get_many(
+        self, ips: Iterable[str], now: Optional[datetime] = None, *, timeout: Optional[float] = None
+    ) -> Dict[str, Optional[str]]:
+        """
+        Resolves each distinct IP once, concurrently. Lookups still running after
+        `timeout` seconds are cancelled and left out of the result.
+        """
+        if now is None:
+            now = datetime.now(timezone.utc)
+        tasks = {asyncio.ensure_future(self.get_geo_string_async(ip, now)): ip for ip in set(ips)}
+        if not tasks:
+            return {}
+
+        done, pending = await asyncio.wait(tasks, timeout=timeout)
+        for task in pending:
+            task.cancel()
+        if pending:
+            self._log_error(", ".join(sorted(tasks[t] for t in pending)), "timed out; retrying next poll", now)
+
+        results: Dict[str, Optional[str]] = {}
+        for task in done:
+            if not task.cancelled() and task.exception() is None:
+                results[tasks[task]] = task.result()
+        return results
+
+    async def aclose(self) -> None:
+        await self._async_client.aclose()
+        self.flush(force=True)
+        self._db.close()
+
+    def _summarize_ipwho_is(self, data: dict) -> tuple[Optional[str], Optional[str]]:
+        if not data.get("success", True):
+            reason = data.get("message") or "ipwho error"
+            return None, reason
+        city = data.get("city")
+        region = data.get("region")
+        country = data.get("country")
+        org = data.get("org")
+        if not org:
+            connection = data.get("connection") or {}
+            org = connection.get("org") or connection.get("isp")
+
+        parts = [p for p in [city, region, country] if p]
+        loc = ", ".join(parts) if parts else None
+        if loc and org:
+            return f"{loc} | {org}", None
+        return (loc or org), None
+
+    async def _lookup_ipwho_is_async(self, ip: str) -> tuple[Optional[str], Optional[str]]:
+        # Back off by skipping lookups (recording nothing) rather than sleeping, so a
+        # throttled host never eats the caller's timeout and the next tick retries.
+        async with self._sem:
+            if time.monotonic() < self._blocked_until_by_host.get(_IPWHO_HOST, 0.0):
+                return None, None
+            try:
+                resp = await self._async_client.get(
+                    _IPWHO_URL.format(ip),
+                    params=_IPWHO_PARAMS,
+                )
+                if resp.status_code == 429 or resp.status_code >= 500:
+                    retries = self._retries_by_host.get(_IPWHO_HOST, 0) + 1
+                    self._retries_by_host[_IPWHO_HOST] = retries
+                    self._blocked_until_by_host[_IPWHO_HOST] = time.monotonic() + min(2**retries, 30)
+                    return None, f"ipwho status {resp.status_code}"
+                self._retries_by_host.pop(_IPWHO_HOST, None)
+                if resp.status_code != 200:
+                    return None, f"ipwho status {resp.status_code}"
+                return self._summarize_ipwho_is(resp.json())
+            except Exception as exc:
+                return None, f"ipwho request failed ({exc.__class__.__name__})"
+
+    def _log_error(self, ip: str, message: str, now: Optional[datetime] = None) -> None:
+        if now is None:
+            now = datetime.now(timezone.utc)
         if self._last_error_msg == message and self._last_error_utc:
             if (now - self._last_error_utc) <= self._error_log_interval:
                 return
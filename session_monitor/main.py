@@ -1,4 +1,6 @@
-import json
+import asyncio
+import concurrent.futures
+import functools
 import os
 import re
 import socket
@@ -13,9 +15,12 @@ from dotenv import load_dotenv
 
 from .geo import GeoCache
 from .state_store import StateStore
-from .wevtutil_security import get_latest_rdp_connects, get_latest_rdp_disconnects, get_latest_rdp_logons
+from .wevtutil_security import get_latest_rdp_logons, get_latest_rdp_session_events
 from .windows_sessions import IdleInfo, SessionInfo, get_quser_sessions
 
+_NONE_PAIR: tuple[None, None] = (None, None)
+_LOGON_TIME_RE = re.compile(r"(\d{1,2}):(\d{2})(?::\d{2})?\s*([ap]\.?m\.?)?", re.IGNORECASE)
+
 
 def _env_int(name: str, default: int) -> int:
     value = os.getenv(name)
@@ -32,26 +37,12 @@ def _env_bool(name: str, default: bool) -> bool:
 
 
 def _parse_users(raw: str) -> list[str]:
-    users = []
-    for part in (raw or "").split(","):
-        part = part.strip()
-        if part:
-            users.append(part.lower())
-    return users
+    return [p.strip().lower() for p in (raw or "").split(",") if p.strip()]
 
 
 def _parse_aliases(raw: str) -> dict[str, str]:
-    aliases: dict[str, str] = {}
-    for part in (raw or "").split(","):
-        part = part.strip()
-        if not part or "=" not in part:
-            continue
-        key, value = part.split("=", 1)
-        key = key.strip().lower()
-        value = value.strip()
-        if key and value:
-            aliases[key] = value
-    return aliases
+    pairs = (p.split("=", 1) for p in (raw or "").split(",") if "=" in p)
+    return {k.strip().lower(): v.strip() for k, v in pairs if k.strip() and v.strip()}
 
 
 def _format_idle_minutes(minutes: int) -> str:
@@ -67,7 +58,7 @@ def _format_idle_minutes(minutes: int) -> str:
 def _format_logon_time(raw: str) -> str:
     if not raw:
         return raw
-    match = re.search(r"(?i)(\d{1,2}):(\d{2})(?::\d{2})?\s*([ap]\.?m\.?)?", raw)
+    match = _LOGON_TIME_RE.search(raw)
     if not match:
         return raw
     hour = int(match.group(1))
@@ -108,10 +99,25 @@ def _format_duration_since(dt: datetime, now: datetime) -> str:
     return f"{_format_duration_minutes(minutes)} ago"
 
 
-@dataclass(frozen=True)
+def _merge_latest(
+    previous: Dict[str, tuple[Optional[str], Optional[datetime]]],
+    latest: Dict[str, tuple[Optional[str], Optional[datetime]]],
+) -> Dict[str, tuple[Optional[str], Optional[datetime]]]:
+    merged = dict(previous)
+    for username, (ip, event_time) in latest.items():
+        if ip is None and event_time is None:
+            continue
+        _, current_time = merged.get(username, _NONE_PAIR)
+        if current_time is None or (event_time is not None and event_time > current_time):
+            merged[username] = (ip, event_time)
+    return merged
+
+
+@dataclass(frozen=True, slots=True)
 class UserPanelRow:
     username: str
     state: str
+    state_lower: str
     idle: IdleInfo
     engaged: bool
     session_id: Optional[str]
@@ -128,29 +134,48 @@ class UserPanelRow:
     last_rdp_geo: Optional[str]
 
 
+def _rows_fingerprint(rows: list[UserPanelRow], now: datetime) -> int:
+    # Durations in the embed are rendered against `now` at minute resolution,
+    # so the minute is part of what the panel shows.
+    return hash((int(now.timestamp() // 60), tuple(rows)))
+
+
 class SessionMonitorClient(discord.Client):
     def __init__(self, *, intents: discord.Intents):
         super().__init__(intents=intents)
         self.channel_id = int(os.environ["CHANNEL_ID"])
 
         self.monitor_users = _parse_users(os.getenv("MONITOR_USERS", "16aa,cantina,16aa_public,16aa_testing"))
+        self._monitor_users_set = frozenset(self.monitor_users)
         self.user_aliases = _parse_aliases(os.getenv("USER_ALIASES", ""))
+        # _display_name relies on both sides already being lowercase.
+        assert all(u == u.lower() for u in self.monitor_users)
+        assert all(k == k.lower() for k in self.user_aliases)
         self.idle_threshold_minutes = _env_int("IDLE_THRESHOLD_MINUTES", 10)
         self.poll_seconds = _env_int("POLL_SECONDS", 15)
         self.security_poll_seconds = _env_int("SECURITY_POLL_SECONDS", 60)
         self.geo_ttl_hours = _env_int("GEOLOOKUP_TTL_HOURS", 24)
 
         self.hostname = socket.gethostname()
+        # One worker per blocking read in a security-refresh tick (quser + two wevtutil queries).
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=3, thread_name_prefix="session-monitor")
         self.state_store = StateStore("data/state.json")
         self.geo_cache = GeoCache(
-            "data/geo_cache.json",
+            "data/geo_cache.sqlite3",
             enabled=_env_bool("GEOLOOKUP_ENABLED", True),
             ttl_hours=self.geo_ttl_hours,
         )
 
         self._panel_message_id: Optional[int] = None
-        self._last_embed_json: Optional[str] = None
+        self._channel: Optional[discord.abc.Messageable] = None
+        self._panel_message: Optional[discord.Message] = None
+        self._last_rows_fp: Optional[int] = None
+        self._panel_embed: Optional[discord.Embed] = None
+        self._last_rows: list[UserPanelRow] = []
+        self._last_render_minute: Optional[int] = None
         self._last_security_poll_utc: Optional[datetime] = None
+        # Highest Security log EventRecordID seen; later polls only read newer 4624s.
+        self._security_bookmark: Optional[int] = None
         self._last_rdp_logons: Dict[str, tuple[Optional[str], Optional[datetime]]] = {
             u: (None, None) for u in self.monitor_users
         }
@@ -160,19 +185,15 @@ class SessionMonitorClient(discord.Client):
         self._last_rdp_disconnects: Dict[str, tuple[Optional[str], Optional[datetime]]] = {
             u: (None, None) for u in self.monitor_users
         }
-        self._last_geo_key_by_user: Dict[str, tuple[Optional[str], Optional[datetime]]] = {
-            u: (None, None) for u in self.monitor_users
-        }
-        self._last_geo_by_user: Dict[str, Optional[str]] = {u: None for u in self.monitor_users}
         self._last_session_states: Dict[str, str] = {u: "" for u in self.monitor_users}
         self._pending_connection_since: Dict[str, Optional[datetime]] = {u: None for u in self.monitor_users}
         self._pending_disconnect_since: Dict[str, Optional[datetime]] = {u: None for u in self.monitor_users}
 
     def _display_name(self, username: str) -> str:
-        return self.user_aliases.get(username.lower(), username)
+        return self.user_aliases.get(username, username)
 
     def _status_dot(self, row: UserPanelRow) -> str:
-        if row.state.lower() == "active":
+        if row.state_lower == "active":
             return ":red_circle:" if row.engaged else ":yellow_circle:"
         return ":green_circle:"
 
@@ -182,30 +203,27 @@ class SessionMonitorClient(discord.Client):
     def _pending_connection_tolerance(self) -> timedelta:
         return timedelta(seconds=max(self.poll_seconds, self.security_poll_seconds) * 2)
 
-    def _update_geo_cache(
+    async def _resolve_geo(
         self,
         *,
         sessions: Dict[str, SessionInfo],
         rdp_ip_by_user: Dict[str, tuple[Optional[str], Optional[datetime]]],
-    ) -> None:
+        now: datetime,
+    ) -> Dict[str, Optional[str]]:
+        # Users behind the same NAT share an IP; look each address up once per tick.
+        unique_ips: set[str] = set()
         for username in self.monitor_users:
             info = sessions.get(username)
             if info is None or info.state.lower() != "active":
-                self._last_geo_key_by_user[username] = (None, None)
-                self._last_geo_by_user[username] = None
                 continue
+            ip = rdp_ip_by_user.get(username, _NONE_PAIR)[0]
+            if ip:
+                unique_ips.add(ip)
 
-            ip, rdp_time = rdp_ip_by_user.get(username, (None, None))
-            key = (ip, rdp_time)
-            if key == self._last_geo_key_by_user.get(username) and self._last_geo_by_user.get(username):
-                continue
-
-            self._last_geo_key_by_user[username] = key
-            if not ip:
-                self._last_geo_by_user[username] = None
-                continue
+        return await self.geo_cache.get_many(unique_ips, now, timeout=7)
 
-            self._last_geo_by_user[username] = self.geo_cache.get_geo_string(ip)
+    def _run_blocking(self, func, /, *args, **kwargs) -> asyncio.Future:
+        return asyncio.get_running_loop().run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
 
     async def on_ready(self) -> None:
         self._panel_message_id = self.state_store.get_panel_message_id()
@@ -213,10 +231,20 @@ class SessionMonitorClient(discord.Client):
         print(f"Logged in as {self.user} (panel_message_id={self._panel_message_id})")
 
     async def close(self) -> None:
+        # Stop polling before tearing down what a tick uses (executor, geo clients, db).
+        self.update_panel.cancel()
+        task = self.update_panel.get_task()
+        if task is not None:
+            await asyncio.gather(task, return_exceptions=True)
         await self._delete_panel_message()
+        await self.geo_cache.aclose()
+        self._executor.shutdown(wait=False)
         await super().close()
 
-    async def _get_or_create_panel_message(self) -> discord.Message:
+    async def _get_panel_channel(self) -> discord.abc.Messageable:
+        if self._channel is not None:
+            return self._channel
+
         channel = self.get_channel(self.channel_id)
         if channel is None:
             try:
@@ -231,49 +259,84 @@ class SessionMonitorClient(discord.Client):
         if not isinstance(channel, discord.abc.Messageable):
             raise RuntimeError("Configured CHANNEL_ID is not a messageable channel or bot cannot see it.")
 
+        self._channel = channel
+        return channel
+
+    async def _get_or_create_panel_message(self, embed: discord.Embed) -> tuple[discord.Message, bool]:
+        """
+        Returns the panel message and whether it was just posted with `embed`
+        (in which case the caller has nothing left to edit).
+        """
+        if self._panel_message is not None:
+            return self._panel_message, False
+
+        channel = await self._get_panel_channel()
+
         if self._panel_message_id is not None:
             try:
-                return await channel.fetch_message(self._panel_message_id)
+                self._panel_message = await channel.fetch_message(self._panel_message_id)
+                return self._panel_message, False
             except discord.NotFound:
                 self._panel_message_id = None
                 self.state_store.set_panel_message_id(None)
 
-        message = await channel.send(embed=self._build_embed(rows=[], last_checked_utc=datetime.now(timezone.utc)))
+        message = await channel.send(embed=embed)
+        self._panel_message = message
         self._panel_message_id = message.id
         self.state_store.set_panel_message_id(message.id)
-        return message
+        return message, True
+
+    async def _edit_panel_message(self, embed: discord.Embed) -> None:
+        message, created = await self._get_or_create_panel_message(embed)
+        if created:
+            return
+        try:
+            await message.edit(embed=embed)
+        except discord.NotFound:
+            # Panel was deleted out from under us; post a fresh one.
+            self._panel_message = None
+            self._panel_message_id = None
+            self.state_store.set_panel_message_id(None)
+            await self._get_or_create_panel_message(embed)
 
     async def _delete_panel_message(self) -> None:
         if self._panel_message_id is None:
             return
 
-        channel = self.get_channel(self.channel_id)
-        if channel is None:
-            try:
-                channel = await self.fetch_channel(self.channel_id)
-            except (discord.NotFound, discord.Forbidden, discord.HTTPException):
+        # Delete by id without fetching the message first when we can.
+        message = self._panel_message
+        if message is None:
+            channel = self._channel or self.get_channel(self.channel_id)
+            if channel is None:
+                try:
+                    channel = await self.fetch_channel(self.channel_id)
+                except (discord.NotFound, discord.Forbidden, discord.HTTPException):
+                    return
+
+            if not isinstance(channel, discord.abc.Messageable):
                 return
 
-        if not isinstance(channel, discord.abc.Messageable):
-            return
-
-        deleted = False
-        try:
-            message = await channel.fetch_message(self._panel_message_id)
-        except discord.NotFound:
-            deleted = True
-        except (discord.Forbidden, discord.HTTPException):
-            return
-        else:
+            if hasattr(channel, "get_partial_message"):
+                message = channel.get_partial_message(self._panel_message_id)
+            else:
+                try:
+                    message = await channel.fetch_message(self._panel_message_id)
+                except discord.NotFound:
+                    message = None
+                except (discord.Forbidden, discord.HTTPException):
+                    return
+
+        if message is not None:
             try:
                 await message.delete()
-                deleted = True
+            except discord.NotFound:
+                pass
             except (discord.Forbidden, discord.HTTPException):
                 return
 
-        if deleted:
-            self._panel_message_id = None
-            self.state_store.set_panel_message_id(None)
+        self._panel_message = None
+        self._panel_message_id = None
+        self.state_store.set_panel_message_id(None)
 
     def _build_rows(
         self,
@@ -281,29 +344,34 @@ class SessionMonitorClient(discord.Client):
         rdp_ip_by_user: Dict[str, tuple[Optional[str], Optional[datetime]]],
         rdp_connect_by_user: Dict[str, tuple[Optional[str], Optional[datetime]]],
         rdp_disconnect_by_user: Dict[str, tuple[Optional[str], Optional[datetime]]],
+        geo_by_ip: Dict[str, Optional[str]],
     ) -> list[UserPanelRow]:
         rows: list[UserPanelRow] = []
         for username in self.monitor_users:
             info = sessions.get(username)
+            last_ip, last_time = rdp_ip_by_user.get(username, _NONE_PAIR)
+            last_connect_time = rdp_connect_by_user.get(username, _NONE_PAIR)[1]
+            last_disconnect_time = rdp_disconnect_by_user.get(username, _NONE_PAIR)[1]
+            pending_conn_since = self._pending_connection_since.get(username)
+            pending_conn = pending_conn_since is not None
+            pending_since = self._pending_disconnect_since.get(username)
+            pending_disconnect = pending_since is not None
             if info is None:
                 idle = IdleInfo(raw="(none)", minutes=None)
-                pending_conn_since = self._pending_connection_since.get(username)
-                pending_conn = pending_conn_since is not None
-                pending_since = self._pending_disconnect_since.get(username)
-                pending_disconnect = pending_since is not None
                 rows.append(
                     UserPanelRow(
                         username=username,
                         state="Missing",
+                        state_lower="missing",
                         idle=idle,
                         engaged=False,
                         session_id=None,
                         session_name=None,
                         logon_time_raw=None,
-                        last_rdp_ip=rdp_ip_by_user.get(username, (None, None))[0],
-                        last_rdp_time_utc=rdp_ip_by_user.get(username, (None, None))[1],
-                        last_rdp_connect_time_utc=rdp_connect_by_user.get(username, (None, None))[1],
-                        last_rdp_disconnect_time_utc=rdp_disconnect_by_user.get(username, (None, None))[1],
+                        last_rdp_ip=last_ip,
+                        last_rdp_time_utc=last_time,
+                        last_rdp_connect_time_utc=last_connect_time,
+                        last_rdp_disconnect_time_utc=last_disconnect_time,
                         pending_connection_since=pending_conn_since,
                         pending_connection=pending_conn,
                         pending_disconnect_since=pending_since,
@@ -313,20 +381,15 @@ class SessionMonitorClient(discord.Client):
                 )
                 continue
 
-            engaged = info.state.lower() == "active" and info.idle.minutes is not None and info.idle.minutes <= self.idle_threshold_minutes
-            last_ip, last_time = rdp_ip_by_user.get(username, (None, None))
-            _, last_connect_time = rdp_connect_by_user.get(username, (None, None))
-            _, last_disconnect_time = rdp_disconnect_by_user.get(username, (None, None))
-            geo = self._last_geo_by_user.get(username) if info.state.lower() == "active" else None
-            pending_conn_since = self._pending_connection_since.get(username)
-            pending_conn = pending_conn_since is not None
-            pending_since = self._pending_disconnect_since.get(username)
-            pending_disconnect = pending_since is not None
+            state_lower = info.state.lower()
+            engaged = state_lower == "active" and info.idle.minutes is not None and info.idle.minutes <= self.idle_threshold_minutes
+            geo = geo_by_ip.get(last_ip) if last_ip and state_lower == "active" else None
 
             rows.append(
                 UserPanelRow(
                     username=username,
                     state=info.state,
+                    state_lower=state_lower,
                     idle=info.idle,
                     engaged=engaged,
                     session_id=info.session_id,
@@ -345,6 +408,62 @@ class SessionMonitorClient(discord.Client):
             )
         return rows
 
+    def _build_field(self, row: UserPanelRow, last_checked_utc: datetime) -> tuple[str, str]:
+        idle_display = row.idle.raw
+        if row.idle.minutes is not None:
+            idle_display = _format_idle_minutes(row.idle.minutes)
+
+        state_display = "Disconnected" if row.state_lower == "disc" else row.state
+        lines = []
+        if row.state_lower == "active":
+            engaged_text = "Yes" if row.engaged else "No"
+            lines.append(f"State: `{state_display}` | Engaged: `{engaged_text}` | Idle: `{idle_display}`")
+            minutes = None
+            effective_rdp_time = row.last_rdp_connect_time_utc or row.last_rdp_time_utc
+            if row.pending_connection_since:
+                tolerance = self._pending_connection_tolerance()
+                if effective_rdp_time is None or effective_rdp_time < (row.pending_connection_since - tolerance):
+                    effective_rdp_time = None
+            if effective_rdp_time:
+                minutes = int(max(0, (last_checked_utc - effective_rdp_time).total_seconds()) // 60)
+            duration = _format_duration_minutes(minutes or 0) if minutes is not None else None
+
+            awaiting_details = row.pending_connection_since is not None and effective_rdp_time is None
+            if awaiting_details:
+                lines.append("Connected: ...")
+            else:
+                parts = ["Connected: `", row.last_rdp_ip or "(unknown)", "`"]
+                if row.last_rdp_ip and row.last_rdp_geo:
+                    parts.extend((" (", row.last_rdp_geo, ")"))
+                if duration:
+                    parts.extend((" | `", duration, "`"))
+                lines.append("".join(parts))
+        else:
+            lines.append(f"State: `{state_display}`")
+            if row.pending_disconnect_since:
+                tolerance = self._pending_disconnect_tolerance()
+                if row.last_rdp_disconnect_time_utc is None or row.last_rdp_disconnect_time_utc < (row.pending_disconnect_since - tolerance):
+                    lines.append("Last Connected: ...")
+                    return f"{self._status_dot(row)} {self._display_name(row.username)}", "\n".join(lines)
+
+            if row.pending_disconnect and row.last_rdp_disconnect_time_utc is None:
+                lines.append("Last Connected: ...")
+            elif row.last_rdp_disconnect_time_utc:
+                last_connected_display = _format_event_time_local(row.last_rdp_disconnect_time_utc)
+                duration = _format_duration_since(row.last_rdp_disconnect_time_utc, last_checked_utc)
+                lines.append(f"Last Connected: `{last_connected_display} ({duration})`")
+            elif row.last_rdp_time_utc:
+                last_connected_display = _format_event_time_local(row.last_rdp_time_utc)
+                duration = _format_duration_since(row.last_rdp_time_utc, last_checked_utc)
+                lines.append(f"Last Connected: `{last_connected_display} ({duration})`")
+            elif row.logon_time_raw:
+                last_connected_display = _format_logon_time(row.logon_time_raw)
+                lines.append(f"Last Connected: `{last_connected_display}`")
+            else:
+                lines.append("Last Connected: `-`")
+
+        return f"{self._status_dot(row)} {self._display_name(row.username)}", "\n".join(lines)
+
     def _build_embed(self, *, rows: list[UserPanelRow], last_checked_utc: datetime) -> discord.Embed:
         embed = discord.Embed(
             title=f"RDP Session Monitor ({self.hostname})",
@@ -354,79 +473,42 @@ class SessionMonitorClient(discord.Client):
         embed.set_footer(text="Last checked")
 
         for row in rows:
-            idle_display = row.idle.raw
-            if row.idle.minutes is not None:
-                idle_display = _format_idle_minutes(row.idle.minutes)
-
-            state_display = "Disconnected" if row.state.lower() == "disc" else row.state
-            lines = []
-            if row.state.lower() == "active":
-                engaged_text = "Yes" if row.engaged else "No"
-                lines.append(f"State: `{state_display}` | Engaged: `{engaged_text}` | Idle: `{idle_display}`")
-                minutes = None
-                effective_rdp_time = row.last_rdp_connect_time_utc or row.last_rdp_time_utc
-                if row.pending_connection_since:
-                    tolerance = self._pending_connection_tolerance()
-                    if effective_rdp_time is None or effective_rdp_time < (row.pending_connection_since - tolerance):
-                        effective_rdp_time = None
-                if effective_rdp_time:
-                    minutes = int(max(0, (last_checked_utc - effective_rdp_time).total_seconds()) // 60)
-                duration = _format_duration_minutes(minutes or 0) if minutes is not None else None
-
-                awaiting_details = row.pending_connection_since is not None and effective_rdp_time is None
-                if awaiting_details:
-                    lines.append("Connected: ...")
-                else:
-                    if row.last_rdp_ip:
-                        ip_line = f"Connected: `{row.last_rdp_ip}`"
-                        if row.last_rdp_geo:
-                            ip_line += f" ({row.last_rdp_geo})"
-                        if duration:
-                            ip_line += f" | `{duration}`"
-                        lines.append(ip_line)
-                    else:
-                        ip_line = "Connected: `(unknown)`"
-                        if duration:
-                            ip_line += f" | `{duration}`"
-                        lines.append(ip_line)
-            else:
-                lines.append(f"State: `{state_display}`")
-                if row.pending_disconnect_since:
-                    tolerance = self._pending_disconnect_tolerance()
-                    if row.last_rdp_disconnect_time_utc is None or row.last_rdp_disconnect_time_utc < (row.pending_disconnect_since - tolerance):
-                        lines.append("Last Connected: ...")
-                        field_name = f"{self._status_dot(row)} {self._display_name(row.username)}"
-                        embed.add_field(name=field_name, value="\n".join(lines), inline=False)
-                        continue
-
-                if row.pending_disconnect and row.last_rdp_disconnect_time_utc is None:
-                    lines.append("Last Connected: ...")
-                elif row.last_rdp_disconnect_time_utc:
-                    last_connected_display = _format_event_time_local(row.last_rdp_disconnect_time_utc)
-                    duration = _format_duration_since(row.last_rdp_disconnect_time_utc, last_checked_utc)
-                    lines.append(f"Last Connected: `{last_connected_display} ({duration})`")
-                elif row.last_rdp_time_utc:
-                    last_connected_display = _format_event_time_local(row.last_rdp_time_utc)
-                    duration = _format_duration_since(row.last_rdp_time_utc, last_checked_utc)
-                    lines.append(f"Last Connected: `{last_connected_display} ({duration})`")
-                elif row.logon_time_raw:
-                    last_connected_display = _format_logon_time(row.logon_time_raw)
-                    lines.append(f"Last Connected: `{last_connected_display}`")
-                else:
-                    lines.append("Last Connected: `-`")
-
-            field_name = f"{self._status_dot(row)} {self._display_name(row.username)}"
-            embed.add_field(name=field_name, value="\n".join(lines), inline=False)
+            name, value = self._build_field(row, last_checked_utc)
+            embed.add_field(name=name, value=value, inline=False)
 
         return embed
 
-    def _embed_to_stable_json(self, embed: discord.Embed) -> str:
-        payload = embed.to_dict()
-        payload.pop("timestamp", None)
-        return json.dumps(payload, sort_keys=True, separators=(",", ":"))
-
-    def _should_refresh_security(self) -> bool:
-        now = datetime.now(timezone.utc)
+    def _patch_embed(self, *, rows: list[UserPanelRow], last_checked_utc: datetime) -> tuple[discord.Embed, bool]:
+        """
+        Updates the cached panel embed in place, re-rendering only rows that changed
+        (or every row once the minute rolls over, since durations are relative).
+
+        Returns the embed and whether any field text changed; the timestamp alone
+        doesn't count, so a minute rollover that renders the same text is no edit.
+        """
+        minute = int(last_checked_utc.timestamp() // 60)
+        embed = self._panel_embed
+        changed = False
+        if embed is None or len(embed.fields) != len(rows) or len(self._last_rows) != len(rows):
+            embed = self._build_embed(rows=rows, last_checked_utc=last_checked_utc)
+            changed = True
+        else:
+            embed.timestamp = last_checked_utc
+            for i, row in enumerate(rows):
+                if row == self._last_rows[i] and minute == self._last_render_minute:
+                    continue
+                name, value = self._build_field(row, last_checked_utc)
+                field = embed.fields[i]
+                if field.name != name or field.value != value:
+                    embed.set_field_at(i, name=name, value=value, inline=False)
+                    changed = True
+
+        self._panel_embed = embed
+        self._last_rows = rows
+        self._last_render_minute = minute
+        return embed, changed
+
+    def _should_refresh_security(self, now: datetime) -> bool:
         if self._last_security_poll_utc is None:
             return True
         return (now - self._last_security_poll_utc) >= timedelta(seconds=self.security_poll_seconds)
@@ -435,7 +517,21 @@ class SessionMonitorClient(discord.Client):
     async def update_panel(self) -> None:
         try:
             now = datetime.now(timezone.utc)
-            sessions = get_quser_sessions()
+            refresh_security = self._should_refresh_security(now)
+            rdp_ip_by_user: Dict[str, tuple[Optional[str], Optional[datetime]]] = {}
+            rdp_connect_by_user: Dict[str, tuple[Optional[str], Optional[datetime]]] = {}
+            rdp_disconnect_by_user: Dict[str, tuple[Optional[str], Optional[datetime]]] = {}
+            if refresh_security:
+                # quser and the two wevtutil reads are independent; overlap them off the event loop.
+                sessions, (new_logons, bookmark), (rdp_connect_by_user, rdp_disconnect_by_user) = await asyncio.gather(
+                    self._run_blocking(get_quser_sessions),
+                    self._run_blocking(
+                        get_latest_rdp_logons, self._monitor_users_set, max_events=250, min_record_id=self._security_bookmark
+                    ),
+                    self._run_blocking(get_latest_rdp_session_events, self._monitor_users_set, max_events=500),
+                )
+            else:
+                sessions = await self._run_blocking(get_quser_sessions)
 
             current_states: Dict[str, str] = {}
             for username in self.monitor_users:
@@ -459,13 +555,9 @@ class SessionMonitorClient(discord.Client):
                     self._pending_disconnect_since[username] = None
                 self._last_session_states[username] = current_state
 
-            rdp_ip_by_user: Dict[str, tuple[Optional[str], Optional[datetime]]] = {}
-            rdp_connect_by_user: Dict[str, tuple[Optional[str], Optional[datetime]]] = {}
-            rdp_disconnect_by_user: Dict[str, tuple[Optional[str], Optional[datetime]]] = {}
-            if self._should_refresh_security():
-                rdp_ip_by_user = get_latest_rdp_logons(self.monitor_users, max_events=250)
-                rdp_connect_by_user = get_latest_rdp_connects(self.monitor_users, max_events=250)
-                rdp_disconnect_by_user = get_latest_rdp_disconnects(self.monitor_users, max_events=250)
+            if refresh_security:
+                self._security_bookmark = bookmark
+                rdp_ip_by_user = _merge_latest(self._last_rdp_logons, new_logons)
                 self._last_security_poll_utc = now
                 self._last_rdp_logons = rdp_ip_by_user
                 self._last_rdp_connects = rdp_connect_by_user
@@ -474,15 +566,15 @@ class SessionMonitorClient(discord.Client):
                 for username, pending_since in self._pending_disconnect_since.items():
                     if pending_since is None:
                         continue
-                    disconnect_time = rdp_disconnect_by_user.get(username, (None, None))[1]
+                    disconnect_time = rdp_disconnect_by_user.get(username, _NONE_PAIR)[1]
                     if disconnect_time and disconnect_time >= (pending_since - tolerance):
                         self._pending_disconnect_since[username] = None
                 tolerance = self._pending_connection_tolerance()
                 for username, pending_since in self._pending_connection_since.items():
                     if pending_since is None:
                         continue
-                    connect_time = rdp_connect_by_user.get(username, (None, None))[1]
-                    logon_time = rdp_ip_by_user.get(username, (None, None))[1]
+                    connect_time = rdp_connect_by_user.get(username, _NONE_PAIR)[1]
+                    logon_time = rdp_ip_by_user.get(username, _NONE_PAIR)[1]
                     if (connect_time and connect_time >= (pending_since - tolerance)) or (
                         logon_time and logon_time >= (pending_since - tolerance)
                     ):
@@ -492,19 +584,25 @@ class SessionMonitorClient(discord.Client):
                 rdp_connect_by_user = self._last_rdp_connects
                 rdp_disconnect_by_user = self._last_rdp_disconnects
 
-            self._update_geo_cache(sessions=sessions, rdp_ip_by_user=rdp_ip_by_user)
+            geo_by_ip = await self._resolve_geo(sessions=sessions, rdp_ip_by_user=rdp_ip_by_user, now=now)
 
-            rows = self._build_rows(sessions, rdp_ip_by_user, rdp_connect_by_user, rdp_disconnect_by_user)
-            embed = self._build_embed(rows=rows, last_checked_utc=now)
-
-            message = await self._get_or_create_panel_message()
+            rows = self._build_rows(sessions, rdp_ip_by_user, rdp_connect_by_user, rdp_disconnect_by_user, geo_by_ip)
+            fp = _rows_fingerprint(rows, now)
+            if fp == self._last_rows_fp:
+                return
 
-            embed_json = self._embed_to_stable_json(embed)
-            if embed_json != self._last_embed_json:
-                await message.edit(embed=embed)
-                self._last_embed_json = embed_json
+            embed, changed = self._patch_embed(rows=rows, last_checked_utc=now)
+            if changed:
+                await self._edit_panel_message(embed)
+            self._last_rows_fp = fp
         except Exception as exc:
+            self._channel = None
+            self._panel_message = None
+            # The cached embed may hold text that never reached Discord; rebuild next tick.
+            self._panel_embed = None
             print(f"[panel] update failed: {exc.__class__.__name__}: {exc}", file=sys.stderr)
+        finally:
+            self.geo_cache.flush()
 
     @update_panel.before_loop
     async def _before_update_panel(self) -> None:
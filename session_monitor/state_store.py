@@ -2,25 +2,40 @@ import json
 import os
 from typing import Optional
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 
 class StateStore:
     def __init__(self, path: str):
         self.path = path
+        self._cache: Optional[dict] = None
 
     def _read(self) -> dict:
-        if not os.path.exists(self.path):
-            return {}
-        try:
-            with open(self.path, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except Exception:
-            return {}
+        if self._cache is not None:
+            return self._cache
+        data = {}
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, "rb") as f:
+                    raw = f.read()
+                data = orjson.loads(raw) if orjson is not None else json.loads(raw)
+            except Exception:
+                data = {}
+        self._cache = data
+        return data
 
     def _write(self, data: dict) -> None:
         os.makedirs(os.path.dirname(self.path), exist_ok=True)
         tmp = self.path + ".tmp"
-        with open(tmp, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2, sort_keys=True)
+        if orjson is not None:
+            payload = orjson.dumps(data, option=orjson.OPT_SORT_KEYS | orjson.OPT_INDENT_2)
+        else:
+            payload = json.dumps(data, indent=2, sort_keys=True).encode("utf-8")
+        with open(tmp, "wb") as f:
+            f.write(payload)
         os.replace(tmp, self.path)
 
     def get_panel_message_id(self) -> Optional[int]:
@@ -34,4 +49,3 @@ class StateStore:
         data = self._read()
         data["panel_message_id"] = message_id
         self._write(data)
-
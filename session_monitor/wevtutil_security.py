@@ -1,7 +1,14 @@
+import locale
 import subprocess
+import sys
 import xml.etree.ElementTree as ET
 from datetime import datetime, timezone
-from typing import Dict, Iterable, Optional
+from typing import Dict, Iterable, Iterator, Optional
+
+_EVENT_TAG = "{http://schemas.microsoft.com/win/2004/08/events/event}Event"
+_READ_CHUNK_CHARS = 64 * 1024
+_NONE_PAIR: tuple[None, None] = (None, None)
+_LOGON_DATA_NAMES = frozenset({"TargetUserName", "LogonType", "IpAddress"})
 
 
 def _parse_event_time_utc(value: str) -> Optional[datetime]:
@@ -9,6 +16,21 @@ def _parse_event_time_utc(value: str) -> Optional[datetime]:
     if not value:
         return None
     value = value.strip()
+    if len(value) >= 20 and value[-1] == "Z" and value[10] == "T" and value[19] in ".Z":
+        # Canonical SystemTime: build the datetime directly instead of going through fromisoformat.
+        try:
+            return datetime(
+                int(value[0:4]),
+                int(value[5:7]),
+                int(value[8:10]),
+                int(value[11:13]),
+                int(value[14:16]),
+                int(value[17:19]),
+                int((value[20:-1] + "000000")[:6]),
+                tzinfo=timezone.utc,
+            )
+        except ValueError:
+            pass
     try:
         if value.endswith("Z"):
             value = value[:-1]
@@ -26,12 +48,12 @@ def _parse_event_time_utc(value: str) -> Optional[datetime]:
         return None
 
 
-def _event_data_map(event: ET.Element) -> dict:
+def _event_data_map(event: ET.Element, names: Optional[frozenset[str]] = None) -> dict:
     ns = {"e": "http://schemas.microsoft.com/win/2004/08/events/event"}
     data = {}
-    for data_node in event.findall(".//e:EventData/e:Data", ns):
+    for data_node in event.iterfind("e:EventData/e:Data", ns):
         name = data_node.attrib.get("Name")
-        if not name:
+        if not name or (names is not None and name not in names):
             continue
         data[name] = (data_node.text or "").strip()
     return data
@@ -46,197 +68,223 @@ def _event_user_data_map(event: ET.Element) -> dict:
     return data
 
 
-def get_latest_rdp_logons(
-    usernames: Iterable[str],
-    *,
-    max_events: int = 250,
-) -> Dict[str, tuple[Optional[str], Optional[datetime]]]:
-    """
-    Best-effort: returns username -> (ip, time_utc) for latest RDP logon.
+def _iter_events(log_name: str, query: str, *, max_events: int) -> Iterator[ET.Element]:
     """
-    allowed_logon_types = {"10", "7"}
-    wanted = {u.lower() for u in usernames}
-    result: Dict[str, tuple[Optional[str], Optional[datetime]]] = {u: (None, None) for u in wanted}
+    Streams <Event> elements from `wevtutil qe`, newest first, without holding
+    the whole result set in memory. Each element is cleared once the caller moves on.
 
-    cp = subprocess.run(
-        [
-            "wevtutil",
-            "qe",
-            "Security",
-            "/q:*[System[(EventID=4624)]] and *[EventData[Data[@Name='LogonType']='10' or Data[@Name='LogonType']='7']]",
-            "/f:xml",
-            "/rd:true",
-            f"/c:{int(max_events)}",
-        ],
-        capture_output=True,
-        text=True,
-        check=False,
+    Raises ET.ParseError (after logging it) if the output is not well-formed, so
+    callers can tell a truncated read from a complete one.
+    """
+    proc = subprocess.Popen(
+        ["wevtutil", "qe", log_name, f"/q:{query}", "/f:xml", "/rd:true", f"/c:{int(max_events)}"],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        # wevtutil writes in the console code page, not UTF-8; decode it like text=True would.
+        encoding=locale.getpreferredencoding(False),
+        errors="replace",
     )
-    raw = (cp.stdout or "").strip()
-    if not raw:
-        return result
-
+    parser = ET.XMLPullParser(events=("end",))
     # wevtutil emits multiple <Event>...</Event> blocks without a single root.
-    xml = f"<Events>{raw}</Events>"
+    parser.feed("<Events>")
+    with proc:
+        try:
+            while True:
+                chunk = proc.stdout.read(_READ_CHUNK_CHARS)
+                parser.feed(chunk or "</Events>")
+                for _, elem in parser.read_events():
+                    if elem.tag == _EVENT_TAG:
+                        yield elem
+                        elem.clear()
+                if not chunk:
+                    return
+        except ET.ParseError as exc:
+            print(f"[wevtutil] {log_name} output parse failed: {exc}", file=sys.stderr)
+            raise
+        finally:
+            # Caller stopped early (or the output was bad); don't wait for wevtutil to finish writing.
+            if proc.poll() is None:
+                proc.terminate()
+
+
+def _wanted_users(usernames: Iterable[str]) -> frozenset[str]:
+    # Callers polling in a loop pass a prebuilt, already-lowercased frozenset.
+    if isinstance(usernames, frozenset):
+        return usernames
+    return frozenset(u.lower() for u in usernames)
+
+
+def _newest_record_id(log_name: str) -> Optional[int]:
+    """
+    Highest EventRecordID currently in `log_name`, from `wevtutil gli`, or None if unknown.
+    """
     try:
-        root = ET.fromstring(xml)
-    except ET.ParseError:
-        return result
-
-    ns = {"e": "http://schemas.microsoft.com/win/2004/08/events/event"}
-
-    for event in root.findall("e:Event", ns):
-        system = event.find("e:System", ns)
-        if system is None:
-            continue
-
-        time_created = system.find("e:TimeCreated", ns)
-        event_time_utc = _parse_event_time_utc(time_created.attrib.get("SystemTime", "") if time_created is not None else "")
-
-        data = _event_data_map(event)
-        target_user = (data.get("TargetUserName") or "").lower()
-        if target_user not in wanted:
-            continue
-
-        logon_type = data.get("LogonType")
-        if logon_type not in allowed_logon_types:
-            continue
-
-        ip = data.get("IpAddress") or ""
-        if not ip or ip in {"-", "::1", "127.0.0.1"}:
-            continue
-
-        current_ip, current_time = result.get(target_user, (None, None))
-        if current_time is None or (event_time_utc is not None and event_time_utc > current_time):
-            result[target_user] = (ip, event_time_utc)
-
-    return result
+        cp = subprocess.run(["wevtutil", "gli", log_name], capture_output=True, text=True, check=False)
+    except OSError:
+        return None
+    info = {}
+    for line in (cp.stdout or "").splitlines():
+        key, sep, value = line.partition(":")
+        if sep:
+            info[key.strip()] = value.strip()
+    oldest = info.get("oldestRecordNumber", "")
+    count = info.get("numberOfLogRecords", "")
+    if not (oldest.isdigit() and count.isdigit()):
+        return None
+    return int(oldest) + int(count) - 1
 
 
-def get_latest_rdp_disconnects(
+def get_latest_rdp_logons(
     usernames: Iterable[str],
     *,
     max_events: int = 250,
-) -> Dict[str, tuple[Optional[str], Optional[datetime]]]:
+    min_record_id: Optional[int] = None,
+) -> tuple[Dict[str, tuple[Optional[str], Optional[datetime]]], Optional[int]]:
     """
-    Best-effort: returns username -> (ip, time_utc) for latest RDP disconnect (LSM EventID 24).
+    Best-effort: returns (username -> (ip, time_utc) for latest RDP logon, bookmark).
+
+    The bookmark is the highest EventRecordID seen. Passing it back as min_record_id
+    only scans events written since, so users without a newer logon come back as
+    (None, None) and callers merge with what they already have. If the log's newest
+    record is below the bookmark (the log was cleared and numbering restarted),
+    the bookmark is ignored and the newest max_events are scanned again.
     """
-    wanted = {u.lower() for u in usernames}
+    if min_record_id is not None:
+        newest = _newest_record_id("Security")
+        if newest is not None and newest < min_record_id:
+            min_record_id = None
+    allowed_logon_types = {"10", "7"}
+    wanted = _wanted_users(usernames)
     result: Dict[str, tuple[Optional[str], Optional[datetime]]] = {u: (None, None) for u in wanted}
-
-    cp = subprocess.run(
-        [
-            "wevtutil",
-            "qe",
-            "Microsoft-Windows-TerminalServices-LocalSessionManager/Operational",
-            "/q:*[System[(EventID=24)]]",
-            "/f:xml",
-            "/rd:true",
-            f"/c:{int(max_events)}",
-        ],
-        capture_output=True,
-        text=True,
-        check=False,
-    )
-    raw = (cp.stdout or "").strip()
-    if not raw:
-        return result
-
-    xml = f"<Events>{raw}</Events>"
-    try:
-        root = ET.fromstring(xml)
-    except ET.ParseError:
-        return result
+    bookmark = min_record_id
+    remaining = set(wanted)
 
     ns = {"e": "http://schemas.microsoft.com/win/2004/08/events/event"}
 
-    for event in root.findall("e:Event", ns):
-        system = event.find("e:System", ns)
-        if system is None:
-            continue
-
-        time_created = system.find("e:TimeCreated", ns)
-        event_time_utc = _parse_event_time_utc(time_created.attrib.get("SystemTime", "") if time_created is not None else "")
+    logon_clause = "Data[@Name='LogonType']='10' or Data[@Name='LogonType']='7'"
+    system_clause = "EventID=4624"
+    if min_record_id is not None:
+        system_clause = f"({system_clause}) and (EventRecordID>{int(min_record_id)})"
+    # No TargetUserName clause: event log XPath compares case-sensitively, and account
+    # names are logged in whatever casing was typed, so users are matched below.
+    query = f"*[System[{system_clause}]] and *[EventData[{logon_clause}]]"
 
-        data = _event_user_data_map(event)
-        user = (data.get("User") or "").strip()
-        if "\\" in user:
-            user = user.split("\\", 1)[1]
-        user = user.lower()
-        if user not in wanted:
-            continue
-
-        address = data.get("Address") or ""
-        if address in {"-", "::1", "127.0.0.1"}:
-            address = ""
-
-        current_ip, current_time = result.get(user, (None, None))
-        if current_time is None or (event_time_utc is not None and event_time_utc > current_time):
-            result[user] = (address or None, event_time_utc)
+    try:
+        for event in _iter_events("Security", query, max_events=max_events):
+            system = event.find("e:System", ns)
+            if system is None:
+                continue
+
+            record_id_node = system.find("e:EventRecordID", ns)
+            record_id_text = (record_id_node.text or "").strip() if record_id_node is not None else ""
+            if record_id_text.isdigit() and (bookmark is None or int(record_id_text) > bookmark):
+                bookmark = int(record_id_text)
+
+            time_created = system.find("e:TimeCreated", ns)
+            event_time_utc = _parse_event_time_utc(time_created.attrib.get("SystemTime", "") if time_created is not None else "")
+
+            data = _event_data_map(event, _LOGON_DATA_NAMES)
+            target_user = (data.get("TargetUserName") or "").lower()
+            if target_user not in wanted:
+                continue
+
+            logon_type = data.get("LogonType")
+            if logon_type not in allowed_logon_types:
+                continue
+
+            ip = data.get("IpAddress") or ""
+            if not ip or ip in {"-", "::1", "127.0.0.1"}:
+                continue
+
+            current_ip, current_time = result.get(target_user, _NONE_PAIR)
+            if current_time is None or (event_time_utc is not None and event_time_utc > current_time):
+                result[target_user] = (ip, event_time_utc)
+
+            # Newest first: once every user has a logon, older events can't change the answer.
+            # The bookmark came from the first event, which has the highest record id.
+            remaining.discard(target_user)
+            if not remaining:
+                break
+    except ET.ParseError:
+        # Keep the old bookmark so the unread tail of this batch is scanned again next poll.
+        return result, min_record_id
 
-    return result
+    return result, bookmark
 
 
-def get_latest_rdp_connects(
+def _latest_lsm_events(
     usernames: Iterable[str],
+    event_ids: tuple[str, ...],
     *,
-    max_events: int = 250,
-) -> Dict[str, tuple[Optional[str], Optional[datetime]]]:
+    max_events: int,
+) -> Dict[str, Dict[str, tuple[Optional[str], Optional[datetime]]]]:
     """
-    Best-effort: returns username -> (ip, time_utc) for latest RDP connect (LSM EventID 25).
+    Best-effort: returns event id -> username -> (ip, time_utc) for the latest
+    LocalSessionManager event of each id, from a single wevtutil query.
     """
-    wanted = {u.lower() for u in usernames}
-    result: Dict[str, tuple[Optional[str], Optional[datetime]]] = {u: (None, None) for u in wanted}
+    wanted = _wanted_users(usernames)
+    results: Dict[str, Dict[str, tuple[Optional[str], Optional[datetime]]]] = {
+        event_id: {u: (None, None) for u in wanted} for event_id in event_ids
+    }
+    remaining = {(event_id, u) for event_id in event_ids for u in wanted}
 
-    cp = subprocess.run(
-        [
-            "wevtutil",
-            "qe",
-            "Microsoft-Windows-TerminalServices-LocalSessionManager/Operational",
-            "/q:*[System[(EventID=25)]]",
-            "/f:xml",
-            "/rd:true",
-            f"/c:{int(max_events)}",
-        ],
-        capture_output=True,
-        text=True,
-        check=False,
-    )
-    raw = (cp.stdout or "").strip()
-    if not raw:
-        return result
+    id_clause = " or ".join(f"EventID={event_id}" for event_id in event_ids)
+    ns = {"e": "http://schemas.microsoft.com/win/2004/08/events/event"}
 
-    xml = f"<Events>{raw}</Events>"
     try:
-        root = ET.fromstring(xml)
+        for event in _iter_events(
+            "Microsoft-Windows-TerminalServices-LocalSessionManager/Operational",
+            f"*[System[({id_clause})]]",
+            max_events=max_events,
+        ):
+            system = event.find("e:System", ns)
+            if system is None:
+                continue
+
+            event_id_node = system.find("e:EventID", ns)
+            event_id = (event_id_node.text or "").strip() if event_id_node is not None else ""
+            result = results.get(event_id)
+            if result is None:
+                continue
+
+            time_created = system.find("e:TimeCreated", ns)
+            event_time_utc = _parse_event_time_utc(time_created.attrib.get("SystemTime", "") if time_created is not None else "")
+
+            data = _event_user_data_map(event)
+            user = (data.get("User") or "").strip()
+            if "\\" in user:
+                user = user.split("\\", 1)[1]
+            user = user.lower()
+            if user not in wanted:
+                continue
+
+            address = data.get("Address") or ""
+            if address in {"-", "::1", "127.0.0.1"}:
+                address = ""
+
+            current_ip, current_time = result.get(user, _NONE_PAIR)
+            if current_time is None or (event_time_utc is not None and event_time_utc > current_time):
+                result[user] = (address or None, event_time_utc)
+
+            # Newest first: stop once every (event id, user) pair has been seen.
+            remaining.discard((event_id, user))
+            if not remaining:
+                break
     except ET.ParseError:
-        return result
-
-    ns = {"e": "http://schemas.microsoft.com/win/2004/08/events/event"}
-
-    for event in root.findall("e:Event", ns):
-        system = event.find("e:System", ns)
-        if system is None:
-            continue
+        # Newest first, so what was read before the bad event is still the latest of it.
+        pass
 
-        time_created = system.find("e:TimeCreated", ns)
-        event_time_utc = _parse_event_time_utc(time_created.attrib.get("SystemTime", "") if time_created is not None else "")
+    return results
 
-        data = _event_user_data_map(event)
-        user = (data.get("User") or "").strip()
-        if "\\" in user:
-            user = user.split("\\", 1)[1]
-        user = user.lower()
-        if user not in wanted:
-            continue
-
-        address = data.get("Address") or ""
-        if address in {"-", "::1", "127.0.0.1"}:
-            address = ""
-
-        current_ip, current_time = result.get(user, (None, None))
-        if current_time is None or (event_time_utc is not None and event_time_utc > current_time):
-            result[user] = (address or None, event_time_utc)
-
-    return result
 
+def get_latest_rdp_session_events(
+    usernames: Iterable[str],
+    *,
+    max_events: int = 500,
+) -> tuple[Dict[str, tuple[Optional[str], Optional[datetime]]], Dict[str, tuple[Optional[str], Optional[datetime]]]]:
+    """
+    Best-effort: returns (connects, disconnects), each username -> (ip, time_utc),
+    for the latest RDP connect (LSM EventID 25) and disconnect (LSM EventID 24).
+    """
+    results = _latest_lsm_events(usernames, ("25", "24"), max_events=max_events)
+    return results["25"], results["24"]
@@ -1,16 +1,22 @@
+import functools
 import re
 import subprocess
 from dataclasses import dataclass
 from typing import Dict, Optional
 
+_COL_SPLIT_RE = re.compile(r"\s{2,}")
 
-@dataclass(frozen=True)
+# username, session name, session id, state, idle raw, logon raw
+_Row = tuple[str, Optional[str], Optional[str], str, str, Optional[str]]
+
+
+@dataclass(frozen=True, slots=True)
 class IdleInfo:
     raw: str
     minutes: Optional[int]
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class SessionInfo:
     username: str
     session_name: Optional[str]
@@ -25,23 +31,64 @@ def _parse_idle_to_minutes(raw: str) -> Optional[int]:
     if raw in {".", "none", "None", ""}:
         return 0
 
-    m = re.fullmatch(r"(\d+)\+(\d+):(\d+)", raw)
-    if m:
-        days = int(m.group(1))
-        hours = int(m.group(2))
-        minutes = int(m.group(3))
-        return (days * 24 + hours) * 60 + minutes
+    # quser idle time is "M", "H:MM" or "D+HH:MM".
+    days_raw, plus, rest = raw.partition("+")
+    if not plus:
+        days_raw, rest = "0", raw
+    hours_raw, colon, minutes_raw = rest.partition(":")
+    if not colon:
+        hours_raw, minutes_raw = "0", rest
+    if not (days_raw.isdigit() and hours_raw.isdigit() and minutes_raw.isdigit()):
+        return None
+    return (int(days_raw) * 24 + int(hours_raw)) * 60 + int(minutes_raw)
 
-    m = re.fullmatch(r"(\d+):(\d+)", raw)
-    if m:
-        hours = int(m.group(1))
-        minutes = int(m.group(2))
-        return hours * 60 + minutes
 
-    if raw.isdigit():
-        return int(raw)
-
-    return None
+@functools.lru_cache(maxsize=4)
+def _column_starts(header: str) -> Optional[tuple[int, int, int]]:
+    """
+    Returns the SESSIONNAME, STATE and LOGON TIME column offsets of a quser header,
+    or None when the header is not the English layout (e.g. localized Windows).
+    """
+    s_sess = header.find("SESSIONNAME")
+    s_state = header.find("STATE")
+    s_logon = header.find("LOGON TIME")
+    if not header.lstrip().startswith("USERNAME") or not (0 < s_sess < s_state < s_logon):
+        return None
+    return s_sess, s_state, s_logon
+
+
+def _split_fixed(line: str, cols: tuple[int, int, int]) -> Optional[_Row]:
+    s_sess, s_state, s_logon = cols
+    username = line[1:s_sess].strip()
+    # ID is right-aligned under its header, so it is the last token before STATE.
+    sess_parts = line[s_sess:s_state].split()
+    state_parts = line[s_state:s_logon].split()
+    if not username or not sess_parts or not state_parts:
+        return None
+    session_id = sess_parts[-1]
+    session_name = " ".join(sess_parts[:-1]) or None
+    state = state_parts[0]
+    idle_raw = " ".join(state_parts[1:])
+    logon_raw = line[s_logon:].strip() or None
+    return username, session_name, session_id, state, idle_raw, logon_raw
+
+
+def _split_heuristic(line: str) -> Optional[_Row]:
+    parts = _COL_SPLIT_RE.split(line.strip())
+    if len(parts) < 5:
+        return None
+
+    # If SESSIONNAME is missing, the second column becomes ID (digit)
+    if parts[1].isdigit():
+        logon_raw = " ".join(parts[4:]).strip() or None
+        return parts[0], None, parts[1], parts[2], parts[3], logon_raw
+
+    session_name = parts[1] if parts[1] else None
+    session_id = parts[2] if len(parts) > 2 else None
+    state = parts[3] if len(parts) > 3 else "Unknown"
+    idle_raw = parts[4] if len(parts) > 4 else ""
+    logon_raw = " ".join(parts[5:]).strip() if len(parts) > 5 else None
+    return parts[0], session_name, session_id, state, idle_raw, logon_raw
 
 
 def get_quser_sessions() -> Dict[str, SessionInfo]:
@@ -58,7 +105,8 @@ def get_quser_sessions() -> Dict[str, SessionInfo]:
     except FileNotFoundError:
         return {}
 
-    text = (cp.stdout or "").strip()
+    # Only strip the right side: the header's leading space is the marker column.
+    text = (cp.stdout or "").rstrip()
     if not text:
         return {}
 
@@ -66,34 +114,19 @@ def get_quser_sessions() -> Dict[str, SessionInfo]:
     if not lines:
         return {}
 
+    cols = _column_starts(lines[0])
     sessions: Dict[str, SessionInfo] = {}
     for line in lines[1:]:
-        line = line.lstrip(">").rstrip()
-        parts = re.split(r"\s{2,}", line.strip())
-        if len(parts) < 5:
+        if cols is not None:
+            # Keep the leading marker column (" " or ">") so offsets line up with the header.
+            fields = _split_fixed(line, cols)
+        else:
+            fields = _split_heuristic(line.lstrip(">"))
+        if fields is None:
             continue
 
-        username = parts[0].strip().lower()
-
-        # If SESSIONNAME is missing, the second column becomes ID (digit)
-        session_name: Optional[str]
-        session_id: Optional[str]
-        state: str
-        idle_raw: str
-        logon_raw: str
-
-        if len(parts) >= 5 and parts[1].isdigit():
-            session_name = None
-            session_id = parts[1]
-            state = parts[2]
-            idle_raw = parts[3]
-            logon_raw = " ".join(parts[4:]).strip() or None
-        else:
-            session_name = parts[1] if parts[1] else None
-            session_id = parts[2] if len(parts) > 2 else None
-            state = parts[3] if len(parts) > 3 else "Unknown"
-            idle_raw = parts[4] if len(parts) > 4 else ""
-            logon_raw = " ".join(parts[5:]).strip() if len(parts) > 5 else None
+        username_raw, session_name, session_id, state, idle_raw, logon_raw = fields
+        username = username_raw.lower()
 
         sessions[username] = SessionInfo(
             username=username,